@@ -0,0 +1,190 @@
+# Performance benchmark for MovieRecommender on seeded synthetic data.
+#
+#   python benchmark.py --users 100000 --movies 20000 --density 0.005 --output results.json
+#
+# Times prepare_data and every recommendation method (p50/p99 over many queries) and records peak RSS,
+# writing machine-readable JSON so runs from different versions can be compared. Method timings are taken with
+# the result cache disabled; the same queries are then replayed through the cache and reported separately.
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from movie_recommender import MovieRecommender
+
+GENRES = [
+    'Action', 'Adventure', 'Animation', 'Biography', 'Comedy', 'Crime', 'Documentary', 'Drama', 'Family',
+    'Fantasy', 'History', 'Horror', 'Music', 'Mystery', 'Romance', 'Sci-Fi', 'Thriller', 'War', 'Western'
+]
+
+def generate_synthetic_data(n_users, n_movies, density, description_words=20, vocabulary_size=5000, seed=42):
+    rng = np.random.default_rng(seed)
+
+    # Catalogue: 1-3 genres per movie, descriptions drawn from a Zipf-like vocabulary
+    genre_counts = rng.integers(1, 4, size=n_movies)
+    genres = ['|'.join(sorted(rng.choice(GENRES, size=count, replace=False))) for count in genre_counts]
+    vocabulary = np.array([f'word{i}' for i in range(vocabulary_size)])
+    word_weights = 1 / np.arange(1, vocabulary_size + 1)
+    words = rng.choice(vocabulary, size=(n_movies, description_words), p=word_weights / word_weights.sum())
+    movies_df = pd.DataFrame({
+        'movie_id': np.arange(1, n_movies + 1, dtype=np.int32),
+        'title': [f'Movie {i}' for i in range(1, n_movies + 1)],
+        'genre': pd.Categorical(genres),
+        'year': rng.integers(1930, 2025, size=n_movies).astype(np.int16),
+        'rating': np.round(rng.uniform(5, 9.5, size=n_movies), 1),
+        'description': [' '.join(row) for row in words]
+    })
+
+    # Ratings: popularity-skewed movie choice, duplicates dropped so density is approximate
+    n_ratings = int(n_users * n_movies * density)
+    popularity = rng.pareto(1.2, size=n_movies) + 1
+    ratings_df = pd.DataFrame({
+        'user_id': rng.integers(1, n_users + 1, size=n_ratings).astype(np.int32),
+        'movie_id': (rng.choice(n_movies, size=n_ratings, p=popularity / popularity.sum()) + 1).astype(np.int32),
+        'rating': rng.choice(np.array([1, 2, 3, 4, 5], dtype=np.int8), size=n_ratings, p=[0.1, 0.1, 0.2, 0.3, 0.3])
+    }).drop_duplicates(['user_id', 'movie_id'], ignore_index=True)
+
+    return movies_df, ratings_df
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def time_calls(function, arguments):
+    timings = []
+    for args in arguments:
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    timings_ms = np.array(timings) * 1000
+    return {
+        'calls': len(timings),
+        'p50_ms': float(np.percentile(timings_ms, 50)),
+        'p99_ms': float(np.percentile(timings_ms, 99)),
+        'mean_ms': float(timings_ms.mean()),
+        'max_ms': float(timings_ms.max())
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmark(n_users, n_movies, density, description_words, n_queries, n_recommendations, seed):
+    rng = np.random.default_rng(seed + 1)
+    results = {
+        'config': {
+            'users': n_users, 'movies': n_movies, 'density': density, 'description_words': description_words,
+            'queries': n_queries, 'n_recommendations': n_recommendations, 'seed': seed
+        },
+        'environment': {
+            'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'platform': platform.platform(), 'git_revision': git_revision()
+        },
+        'stages': {},
+        'methods': {},
+        'cached_methods': {}
+    }
+
+    start = time.perf_counter()
+    movies_df, ratings_df = generate_synthetic_data(n_users, n_movies, density, description_words, seed=seed)
+    results['stages']['generate_data_s'] = time.perf_counter() - start
+    results['config']['ratings'] = len(ratings_df)
+    results['peak_rss_mb_after_data'] = peak_rss_mb()
+
+    recommender = MovieRecommender(movies_df, ratings_df)
+    start = time.perf_counter()
+    recommender.prepare_data()
+    results['stages']['prepare_data_s'] = time.perf_counter() - start
+    results['peak_rss_mb_after_prepare'] = peak_rss_mb()
+
+    user_ids = rng.choice(recommender.user_ids, size=n_queries)
+    titles = movies_df['title'].to_numpy()
+    queries = {
+        'collaborative_filtering_recommendations': (
+            recommender.collaborative_filtering_recommendations,
+            [(user_id, n_recommendations) for user_id in user_ids]
+        ),
+        'matrix_factorization_recommendations': (
+            recommender.matrix_factorization_recommendations,
+            [(user_id, n_recommendations) for user_id in user_ids]
+        ),
+        'hybrid_recommendations': (
+            recommender.hybrid_recommendations,
+            [(user_id, n_recommendations) for user_id in user_ids]
+        ),
+        'content_based_recommendations': (
+            recommender.content_based_recommendations,
+            [(list(rng.choice(titles, size=rng.integers(1, 4))), n_recommendations) for _ in range(n_queries)]
+        ),
+        'genre_based_recommendations': (
+            recommender.genre_based_recommendations,
+            [(list(rng.choice(GENRES, size=rng.integers(1, 3), replace=False)), n_recommendations) for _ in range(n_queries)]
+        ),
+        'get_popular_movies': (
+            recommender.get_popular_movies,
+            [(n_recommendations,) for _ in range(n_queries)]
+        )
+    }
+    # Uncached: every call computes its result, so these are comparable across versions
+    result_cache = recommender.result_cache
+    recommender.result_cache = None
+    for name, (function, arguments) in queries.items():
+        results['methods'][name] = time_calls(function, arguments)
+
+    # Cached: one warm-up pass fills the result cache, then the same queries are timed again as hits
+    recommender.result_cache = result_cache
+    for name, (function, arguments) in queries.items():
+        time_calls(function, arguments)
+        results['cached_methods'][name] = time_calls(function, arguments)
+    results['result_cache'] = result_cache.stats()
+
+    # Batch scoring throughput for the whole query set in one call
+    start = time.perf_counter()
+    recommender.collaborative_filtering_top_k(user_ids, n_recommendations)
+    elapsed = time.perf_counter() - start
+    results['methods']['collaborative_filtering_top_k'] = {
+        'users': len(user_ids), 'total_ms': elapsed * 1000, 'users_per_s': len(user_ids) / elapsed if elapsed else None
+    }
+
+    results['peak_rss_mb'] = peak_rss_mb()
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark MovieRecommender on synthetic data.')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--movies', type=int, default=2000)
+    parser.add_argument('--density', type=float, default=0.01, help='Fraction of the user x movie matrix rated')
+    parser.add_argument('--description-words', type=int, default=20)
+    parser.add_argument('--queries', type=int, default=200, help='Timed calls per recommendation method')
+    parser.add_argument('-n', '--n-recommendations', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write JSON results here (default: stdout)')
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(
+        args.users, args.movies, args.density, args.description_words,
+        args.queries, args.n_recommendations, args.seed
+    )
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+    else:
+        print(report)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# Load test for recommendation_server.py: concurrent keep-alive clients, reports throughput and tail latency.
+#
+#   python recommendation_server.py --port 8000 &
+#   python load_test.py --port 8000 --concurrency 64 --duration 10 --mode collaborative
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlencode
+
+import numpy as np
+
+GENRES = ['Action', 'Adventure', 'Comedy', 'Crime', 'Drama', 'Romance', 'Sci-Fi', 'Thriller']
+
+def request_path(mode, rng, args, titles):
+    if mode == 'collaborative':
+        return '/recommendations/collaborative?' + urlencode({'user_id': rng.randint(args.min_user, args.max_user), 'n': args.n})
+    if mode == 'hybrid':
+        return '/recommendations/hybrid?' + urlencode({
+            'user_id': rng.randint(args.min_user, args.max_user), 'collaborative_weight': rng.choice([0.3, 0.5, 0.7]), 'n': args.n
+        })
+    if mode == 'content':
+        return '/recommendations/content?' + urlencode([('title', title) for title in rng.sample(titles, min(2, len(titles)))] + [('n', args.n)])
+    if mode == 'genre':
+        return '/recommendations/genre?' + urlencode([('genre', genre) for genre in rng.sample(GENRES, 2)] + [('n', args.n)])
+    return '/recommendations/popular?' + urlencode({'n': args.n})
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ', 2)[1])
+    length = 0
+    for line in lines[1:]:
+        if line.lower().startswith('content-length:'):
+            length = int(line.split(':', 1)[1])
+    body = await reader.readexactly(length)
+    return status, body
+
+async def client(args, deadline, seed, titles, latencies, errors):
+    rng = random.Random(seed)
+    modes = args.mode.split(',')
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    try:
+        while time.perf_counter() < deadline:
+            path = request_path(rng.choice(modes), rng, args, titles)
+            start = time.perf_counter()
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: {args.host}\r\n\r\n'.encode())
+            await writer.drain()
+            status, _ = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+async def fetch_titles(args):
+    # Content queries need real titles; sample them from a popular-movies response
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    writer.write(f'GET /recommendations/popular?n=100 HTTP/1.1\r\nHost: {args.host}\r\nConnection: close\r\n\r\n'.encode())
+    await writer.drain()
+    _, body = await read_response(reader)
+    writer.close()
+    return [movie['title'] for movie in json.loads(body)]
+
+async def run(args):
+    titles = await fetch_titles(args) if 'content' in args.mode else []
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*[
+        client(args, deadline, args.seed + i, titles, latencies, errors) for i in range(args.concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'mode': args.mode,
+        'concurrency': args.concurrency,
+        'duration_s': elapsed,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput_rps': len(latencies) / elapsed,
+        'latency_ms': {
+            'p50': float(np.percentile(latencies_ms, 50)) if len(latencies) else None,
+            'p90': float(np.percentile(latencies_ms, 90)) if len(latencies) else None,
+            'p99': float(np.percentile(latencies_ms, 99)) if len(latencies) else None,
+            'max': float(latencies_ms.max()) if len(latencies) else None
+        }
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the recommendation HTTP service.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent keep-alive connections')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run')
+    parser.add_argument('--mode', default='collaborative',
+                        help='Comma-separated mix of collaborative, hybrid, content, genre, popular')
+    parser.add_argument('-n', type=int, default=10, help='Recommendations per request')
+    parser.add_argument('--min-user', type=int, default=1)
+    parser.add_argument('--max-user', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        latency = report['latency_ms']
+        print(f"{report['requests']} requests in {report['duration_s']:.1f}s "
+              f"({report['throughput_rps']:.0f} req/s, {report['errors']} errors, concurrency {report['concurrency']})")
+        if report['requests']:
+            print(f"latency ms: p50 {latency['p50']:.2f}  p90 {latency['p90']:.2f}  "
+                  f"p99 {latency['p99']:.2f}  max {latency['max']:.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,23 @@
-import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.decomposition import TruncatedSVD
-import plotly.express as px
-import plotly.graph_objects as go
-
-# Set page config
-st.set_page_config(
-    page_title="Movie Recommendation System",
-    page_icon="🎬",
-    layout="wide"
-)
+import argparse
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from scipy import sparse
 
 # Sample movie data
-@st.cache_data
 def load_sample_data():
     movies_data = {
         'movie_id': range(1, 51),
@@ -131,165 +133,1126 @@ def load_sample_data():
                 'rating': rating
             })
     
-    movies_df = pd.DataFrame(movies_data)
-    ratings_df = pd.DataFrame(user_ratings)
+    movies_df = pd.DataFrame(movies_data).astype({'movie_id': np.int32, 'year': np.int16, 'genre': 'category'})
+    ratings_df = pd.DataFrame(user_ratings).astype({'user_id': np.int32, 'movie_id': np.int32, 'rating': np.int8})
+    
+    return movies_df, ratings_df
+
+# Real datasets (e.g. MovieLens ratings.csv / movies.csv, or Parquet) are used instead of the sample when configured
+RATINGS_PATH = os.environ.get('MOVIE_RECOMMENDER_RATINGS')
+MOVIES_PATH = os.environ.get('MOVIE_RECOMMENDER_MOVIES')
+CHUNK_SIZE = 1_000_000
+
+COLUMN_ALIASES = {'userId': 'user_id', 'movieId': 'movie_id', 'genres': 'genre'}
+RATINGS_DTYPES = {'user_id': np.int32, 'movie_id': np.int32, 'rating': np.float32}
+
+def _iter_chunks(path, columns, chunksize=CHUNK_SIZE):
+    # Stream a CSV or Parquet file in chunks of at most chunksize rows, with canonical column names
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq  # Optional dependency, only needed for Parquet input
+        parquet_file = pq.ParquetFile(path)
+        source_names = {COLUMN_ALIASES.get(name, name): name for name in parquet_file.schema_arrow.names}
+        batches = parquet_file.iter_batches(batch_size=chunksize, columns=[source_names[c] for c in columns])
+        for batch in batches:
+            yield batch.to_pandas().rename(columns=COLUMN_ALIASES)
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        source_names = {COLUMN_ALIASES.get(name, name): name for name in header}
+        dtype = {source_names[c]: RATINGS_DTYPES[c] for c in columns if c in RATINGS_DTYPES}
+        reader = pd.read_csv(path, usecols=[source_names[c] for c in columns], dtype=dtype, chunksize=chunksize)
+        for chunk in reader:
+            yield chunk.rename(columns=COLUMN_ALIASES)
+
+def load_ratings(path, chunksize=CHUNK_SIZE):
+    # Only the compact numpy columns of each chunk are kept, so peak memory stays near the final int32/float32 size
+    user_chunks, movie_chunks, rating_chunks = [], [], []
+    for chunk in _iter_chunks(path, ['user_id', 'movie_id', 'rating'], chunksize):
+        user_chunks.append(chunk['user_id'].to_numpy(dtype=np.int32))
+        movie_chunks.append(chunk['movie_id'].to_numpy(dtype=np.int32))
+        rating_chunks.append(chunk['rating'].to_numpy(dtype=np.float32))
     
+    ratings = np.concatenate(rating_chunks) if rating_chunks else np.empty(0, dtype=np.float32)
+    if len(ratings) and np.all(ratings == np.round(ratings)) and ratings.min() >= -128 and ratings.max() <= 127:
+        ratings = ratings.astype(np.int8)  # Whole-star scales fit in one byte
+    
+    return pd.DataFrame({
+        'user_id': np.concatenate(user_chunks) if user_chunks else np.empty(0, dtype=np.int32),
+        'movie_id': np.concatenate(movie_chunks) if movie_chunks else np.empty(0, dtype=np.int32),
+        'rating': ratings
+    }, copy=False)
+
+def load_movies(path, ratings_df):
+    # Movie tables are small; fill in the columns the app expects when the source (e.g. MovieLens) lacks them
+    movies_df = pd.concat(_iter_chunks(path, _available_columns(path)), ignore_index=True)
+    movies_df['movie_id'] = movies_df['movie_id'].astype(np.int32)
+    
+    if 'year' not in movies_df:
+        year = movies_df['title'].str.extract(r'\((\d{4})\)\s*$', expand=False)
+        movies_df['year'] = pd.to_numeric(year, errors='coerce').fillna(0).astype(np.int16)
+        movies_df['title'] = movies_df['title'].str.replace(r'\s*\(\d{4}\)\s*$', '', regex=True)
+    if 'rating' not in movies_df:
+        # Mean user rating per movie, rescaled to the 10-point scale used by the sample catalogue
+        movie_ids = ratings_df['movie_id'].to_numpy()
+        size = int(max(movie_ids.max(initial=0), movies_df['movie_id'].max()) + 1)
+        sums = np.bincount(movie_ids, weights=ratings_df['rating'].to_numpy(dtype=np.float64), minlength=size)
+        counts = np.bincount(movie_ids, minlength=size)
+        means = np.divide(sums, counts, out=np.zeros(size), where=counts > 0)
+        scale = 10 / max(float(ratings_df['rating'].max()), 1) if len(ratings_df) else 1
+        movies_df['rating'] = np.round(means[movies_df['movie_id'].to_numpy()] * scale, 1)
+    if 'description' not in movies_df:
+        movies_df['description'] = ''
+    
+    movies_df['genre'] = movies_df['genre'].astype('category')
+    return movies_df
+
+def _available_columns(path):
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        names = pq.ParquetFile(path).schema_arrow.names
+    else:
+        names = pd.read_csv(path, nrows=0).columns
+    return [COLUMN_ALIASES.get(name, name) for name in names]
+
+def load_dataset(ratings_path, movies_path, chunksize=CHUNK_SIZE):
+    ratings_df = load_ratings(ratings_path, chunksize)
+    movies_df = load_movies(movies_path, ratings_df)
     return movies_df, ratings_df
 
+def load_data():
+    if RATINGS_PATH and MOVIES_PATH:
+        return load_dataset(RATINGS_PATH, MOVIES_PATH)
+    return load_sample_data()
+
+# Fitted model artifacts are persisted here, one sub-directory per data fingerprint
+ARTIFACT_DIR = os.environ.get('MOVIE_RECOMMENDER_ARTIFACTS', '.model_artifacts')
+ARTIFACT_VERSION = 3
+
+def data_fingerprint(movies_df, ratings_df, *params):
+    # Hash the raw column buffers (object columns via pandas' row hashes) plus model parameters
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((ARTIFACT_VERSION,) + params).encode())
+    for df in (movies_df, ratings_df):
+        for column in df.columns.drop('combined_features', errors='ignore'):
+            values = df[column].to_numpy()
+            if values.dtype == object:
+                values = pd.util.hash_pandas_object(df[column], index=False).to_numpy()
+            digest.update(f'{column}:{values.dtype}:{len(values)}'.encode())
+            digest.update(np.ascontiguousarray(values))
+    return digest.hexdigest()
+
+class PerformanceStats:
+    # Per-stage wall-clock timings and event counters for a recommender. If profiler_hook is set, it is called with
+    # the stage name and must return a context manager that is entered around the stage (e.g. to drive a sampling
+    # profiler). Each finished stage is also emitted as a JSON debug log record on the performance logger.
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.profiler_hook = None
+        self.logger = logging.getLogger('movie_recommender.performance')
+        self._lock = threading.Lock()
+        self.timings = {}
+        self.counters = {}
+    
+    def reset(self):
+        with self._lock:
+            self.timings = {}
+            self.counters = {}
+    
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        profiler = self.profiler_hook(name) if self.profiler_hook else nullcontext()
+        start = time.perf_counter()
+        try:
+            with profiler:
+                yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+    
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                timing = self.timings[name] = {'calls': 0, 'total_s': 0.0, 'max_s': 0.0, 'last_s': 0.0}
+            timing['calls'] += 1
+            timing['total_s'] += seconds
+            timing['max_s'] = max(timing['max_s'], seconds)
+            timing['last_s'] = seconds
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(json.dumps({'event': 'stage', 'stage': name, 'seconds': seconds}))
+    
+    def increment(self, name, amount=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def snapshot(self):
+        with self._lock:
+            return {
+                'timings': {name: dict(timing) for name, timing in self.timings.items()},
+                'counters': dict(self.counters)
+            }
+    
+    def to_frame(self):
+        rows = [
+            {
+                'stage': name, 'calls': timing['calls'], 'total_ms': timing['total_s'] * 1000,
+                'mean_ms': timing['total_s'] * 1000 / timing['calls'], 'max_ms': timing['max_s'] * 1000,
+                'last_ms': timing['last_s'] * 1000
+            }
+            for name, timing in self.snapshot()['timings'].items()
+        ]
+        columns = ['stage', 'calls', 'total_ms', 'mean_ms', 'max_ms', 'last_ms']
+        return pd.DataFrame(rows, columns=columns).sort_values('total_ms', ascending=False, ignore_index=True)
+    
+    def log_snapshot(self, level=logging.INFO):
+        self.logger.log(level, json.dumps({'event': 'performance_snapshot', **self.snapshot()}))
+
+def timed_stage(name):
+    # Method decorator recording the whole call as one stage in self.stats
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.stats.stage(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+class ResultCache:
+    # Thread-safe LRU cache of recommendation results, bounded by entry count and approximate bytes, with an
+    # optional TTL in seconds
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = self.misses = self.evictions = self.expirations = 0
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+    
+    def put(self, key, value, size):
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries), 'bytes': self._bytes, 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'expirations': self.expirations
+            }
+
+def _result_size(records):
+    # Approximate retained size of a list of flat result records
+    return sys.getsizeof(records) + sum(
+        sys.getsizeof(record) + sum(sys.getsizeof(value) for value in record.values()) for record in records
+    )
+
+def cached_result(normalize=None):
+    # Method decorator serving results from self.result_cache. The key is the method name, the recommender's
+    # data_version (so any data change invalidates older entries) and the normalized arguments; normalize gets the
+    # bound arguments and returns the (hashable) arguments to key on and call with, or None if not cacheable.
+    def decorator(method):
+        signature = inspect.signature(method)
+        
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            del arguments['self']
+            if normalize is not None:
+                arguments = normalize(arguments)
+            if self.result_cache is None or arguments is None:
+                return method(self, *args, **kwargs)
+            
+            key = (method.__name__, self.data_version, tuple(arguments.items()))
+            hit, records = self.result_cache.get(key)
+            if not hit:
+                records = method(self, **arguments)
+                self.result_cache.put(key, records, _result_size(records))
+            return [dict(record) for record in records]  # Callers get copies, never the cached records
+        return wrapper
+    return decorator
+
+def _normalize_titles(arguments):
+    return dict(arguments, movie_titles=tuple(sorted(str(title) for title in arguments['movie_titles'])))
+
+def _normalize_genres(arguments):
+    # Genre matching is case-insensitive and set-based
+    return dict(arguments, preferred_genres=tuple(sorted({str(genre).lower() for genre in arguments['preferred_genres']})))
+
+def _normalize_user(arguments):
+    if arguments.get('ratings'):
+        return None  # Folded-in ratings are per-request data
+    return dict(arguments, user_id=int(arguments['user_id']))
+
+def _normalize_hybrid(arguments):
+    arguments = _normalize_user(arguments)
+    if arguments is not None and arguments['genres']:
+        arguments = dict(_normalize_genres(dict(arguments, preferred_genres=arguments['genres'])))
+        arguments['genres'] = arguments.pop('preferred_genres')
+    return arguments
+
 class MovieRecommender:
+    n_similar_users = 10
+    collaborative_block_elements = 2 ** 22  # Dense user x user / user x movie cells per collaborative batch
+    content_neighbours = 50
+    n_factors = 32
+    # Similarity cells in flight at once across all content-index workers. Each cell costs about 20 bytes while a
+    # block is ranked (sparse product, dense float32 copy and top-k index), so the default peaks near 170 MB.
+    content_block_elements = 2 ** 23
+    genre_scan_block = 4096
+    result_cache_entries = 1024
+    result_cache_bytes = 64 * 1024 * 1024
+    result_cache_ttl = None  # Seconds; None keeps entries until evicted or invalidated by a data change
+    hybrid_confidence_ratings = 10  # Ratings a user needs before hybrid collaborative scores get full weight
+    
+    # Fitted state written by save() and memory-mapped back by load()
+    _artifact_arrays = (
+        'user_ids', 'movie_ids', 'user_norms', 'content_neighbour_ids', 'content_neighbour_scores',
+        'user_factors', 'item_factors'
+    )
+    _artifact_matrices = ('user_movie_matrix', 'user_movie_matrix_t', 'tfidf_matrix')
+    
     def __init__(self, movies_df, ratings_df):
         self.movies_df = movies_df
         self.ratings_df = ratings_df
         self.user_movie_matrix = None
+        self.user_movie_matrix_t = None
+        self.user_ids = None
+        self.movie_ids = None
+        self.user_norms = None
+        self.user_factors = None
+        self.item_factors = None
         self.movie_similarity_matrix = None
+        self.tfidf_vectorizer = None
+        self.tfidf_vocabulary = None
+        self.tfidf_idf = None
         self.tfidf_matrix = None
-        self.content_similarity_matrix = None
+        self.content_neighbour_ids = None
+        self.content_neighbour_scores = None
+        self.fingerprint = None
+        self.movie_id_index = None
+        self.movie_id_rows = None
+        self.title_index = None
+        self.title_rows = None
+        self.column_rows = None
+        self.popular_rows = None
+        self.result_columns = None
+        self.genre_names = None
+        self.genre_bit_positions = None
+        self.genre_bits = None
+        self.genre_counts = None
+        self.rating_counts = None
+        self.n_ratings = 0
+        self.stats = PerformanceStats()
+        self.result_cache = ResultCache(self.result_cache_entries, self.result_cache_bytes, self.result_cache_ttl)
+        self.data_version = 0
+    
+    @property
+    def ratings_df(self):
+        # Batches from add_ratings are kept as separate frames and only concatenated when the full table is read
+        if len(self._ratings_frames) > 1:
+            self._ratings_frames = [pd.concat(self._ratings_frames, ignore_index=True)]
+        return self._ratings_frames[0]
+    
+    @ratings_df.setter
+    def ratings_df(self, ratings_df):
+        self._ratings_frames = [ratings_df]
         
+    @timed_stage('prepare_data')
     def prepare_data(self):
-        # Create user-movie matrix for collaborative filtering
-        self.user_movie_matrix = self.ratings_df.pivot_table(
-            index='user_id', 
-            columns='movie_id', 
-            values='rating'
-        ).fillna(0)
+        # Create sparse user-movie matrix for collaborative filtering
+        with self.stats.stage('build_user_movie_matrix'):
+            self.user_movie_matrix, self.user_ids, self.movie_ids = self._build_user_movie_matrix(self.ratings_df)
+            # Movie x user CSR copy, so user-user products do not convert a CSC transpose on every request
+            self.user_movie_matrix_t = self.user_movie_matrix.T.tocsr()
+            self.user_norms = self._row_norms(self.user_movie_matrix)
+        self._build_rating_summary()
+        
+        # Latent factors for matrix factorization recommendations
+        with self.stats.stage('fit_factors'):
+            self.user_factors, self.item_factors = self._build_factors(self.user_movie_matrix, self.n_factors)
         
         # Prepare content-based filtering
-        self.movies_df['combined_features'] = (
-            self.movies_df['genre'].fillna('') + ' ' + 
-            self.movies_df['description'].fillna('')
-        )
+        self.movies_df['combined_features'] = self._combined_features(self.movies_df)
         
         # TF-IDF Vectorization
-        tfidf = TfidfVectorizer(stop_words='english', max_features=5000)
-        self.tfidf_matrix = tfidf.fit_transform(self.movies_df['combined_features'])
+        with self.stats.stage('tfidf_fit'):
+            self.tfidf_vectorizer = self._make_vectorizer()
+            self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(self.movies_df['combined_features'])
+            self.tfidf_vocabulary, self.tfidf_idf = self.tfidf_vectorizer.vocabulary_, self.tfidf_vectorizer.idf_
+        
+        # Top-K content neighbour index (row positions + scores) instead of the full N x N similarity matrix
+        with self.stats.stage('build_content_neighbours'):
+            self.content_neighbour_ids, self.content_neighbour_scores = self._build_content_neighbours(
+                self.tfidf_matrix, self.content_neighbours
+            )
+        
+        self._build_lookups()
+        self.data_version += 1  # Only after the rebuild, so results cached mid-rebuild stay under the old version
+    
+    @staticmethod
+    def _count_ratings(values):
+        counts = np.unique(values, return_counts=True)
+        return pd.Series(counts[1], index=counts[0], dtype=np.int64)
+    
+    def _build_rating_summary(self):
+        # Rating histogram (count per distinct rating value) and total, kept up to date by add_ratings so the
+        # dashboard never re-reads the ratings table
+        ratings = self.ratings_df['rating'].to_numpy()
+        self.rating_counts = self._count_ratings(ratings)
+        self.n_ratings = len(ratings)
+    
+    @timed_stage('build_lookups')
+    def _build_lookups(self):
+        # Hash indexes for movie_id/title -> catalogue row, so lookups are O(1) instead of full-table scans
+        self.movie_id_index, self.movie_id_rows = self._first_occurrence_index(self.movies_df['movie_id'])
+        self.title_index, self.title_rows = self._first_occurrence_index(self.movies_df['title'])
+        self.column_rows = self._movie_rows(self.movie_ids)  # User-movie matrix column -> catalogue row
+        self.popular_rows = np.argsort(-self.movies_df['rating'].to_numpy(), kind='stable').astype(np.int32)
+        
+        # Columnar copies of the fields returned with every recommendation, gathered with one take per column
+        self.result_columns = {
+            name: self.movies_df[name].to_numpy() for name in ('title', 'genre', 'year', 'rating')
+        }
+        
+        self._build_genre_index()
+    
+    def _build_genre_index(self):
+        # Parse each distinct genre string once (via its category) into a bitmask, then broadcast to movies by code
+        genres = self.movies_df['genre'].astype('category')
+        categories = [str(category).split('|') for category in genres.cat.categories]
+        self.genre_names = sorted({name for names in categories for name in names if name})
+        self.genre_bit_positions = {name.lower(): bit for bit, name in enumerate(self.genre_names)}
+        
+        n_words = max(1, (len(self.genre_names) + 63) // 64)
+        category_bits = np.zeros((len(categories) + 1, n_words), dtype=np.uint64)  # Last row is for missing genres
+        for code, names in enumerate(categories):
+            for name in names:
+                if name:
+                    bit = self.genre_bit_positions[name.lower()]
+                    category_bits[code, bit // 64] |= np.uint64(1 << (bit % 64))
+        codes = genres.cat.codes.to_numpy()
+        self.genre_bits = category_bits[codes]  # Code -1 (missing) selects the all-zero last row
+        
+        # Per-genre movie counts, also derived from category counts rather than re-splitting every movie
+        category_counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+        genre_counts = dict.fromkeys(self.genre_names, 0)
+        for names, count in zip(categories, category_counts):
+            for name in names:
+                if name:
+                    genre_counts[name] += int(count)
+        self.genre_counts = pd.Series(genre_counts, dtype=np.int64).sort_values(ascending=False, kind='stable')
+    
+    def _genre_query(self, genres):
+        query = np.zeros(self.genre_bits.shape[1], dtype=np.uint64)
+        for genre in genres:
+            bit = self.genre_bit_positions.get(str(genre).lower())
+            if bit is not None:
+                query[bit // 64] |= np.uint64(1 << (bit % 64))
+        return query
+    
+    @staticmethod
+    def _first_occurrence_index(values):
+        first = ~values.duplicated().to_numpy()
+        return pd.Index(values[first]), np.flatnonzero(first).astype(np.int32)
+    
+    @staticmethod
+    def _lookup_rows(index, rows, keys):
+        positions = index.get_indexer(keys)
+        return np.where(positions >= 0, rows[positions], -1).astype(np.int32)
+    
+    def _movie_rows(self, movie_ids):
+        return self._lookup_rows(self.movie_id_index, self.movie_id_rows, np.asarray(movie_ids).ravel())
+    
+    def _title_rows(self, titles):
+        return self._lookup_rows(self.title_index, self.title_rows, list(titles))
+    
+    @staticmethod
+    def _build_factors(matrix, n_factors):
+        # Rank-k TruncatedSVD: R ~ (U S) V^T, with U S as user factors and V as item factors
+        n_components = min(n_factors, min(matrix.shape) - 1)
+        if n_components < 1:
+            return np.zeros((matrix.shape[0], 0), dtype=np.float32), np.zeros((matrix.shape[1], 0), dtype=np.float32)
+        from sklearn.decomposition import TruncatedSVD  # Imported on first fit so headless use skips sklearn startup
+        svd = TruncatedSVD(n_components=n_components, random_state=42)
+        user_factors = svd.fit_transform(matrix).astype(np.float32)
+        item_factors = np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+        return user_factors, item_factors
+    
+    @staticmethod
+    def _combined_features(movies_df):
+        return (
+            movies_df['genre'].astype(object).fillna('') + ' ' + 
+            movies_df['description'].astype(object).fillna('')
+        )
+    
+    @staticmethod
+    def _make_vectorizer():
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        return TfidfVectorizer(stop_words='english', max_features=5000, dtype=np.float32)
+    
+    def _fitted_vectorizer(self):
+        # load() keeps only the vocabulary and idf weights; the sklearn vectorizer is rebuilt when first needed
+        if self.tfidf_vectorizer is None:
+            self.tfidf_vectorizer = self._make_vectorizer()
+            self.tfidf_vectorizer.vocabulary_ = self.tfidf_vocabulary
+            self.tfidf_vectorizer.idf_ = self.tfidf_idf
+        return self.tfidf_vectorizer
+    
+    def model_fingerprint(self):
+        return data_fingerprint(
+            self.movies_df, self.ratings_df, self.n_similar_users, self.content_neighbours, self.n_factors
+        )
+    
+    @timed_stage('save_artifacts')
+    def save(self, directory):
+        # Write into a temporary sibling directory and rename it into place, so readers never see partial artifacts
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=parent, prefix='.staging-')
+        try:
+            for name in self._artifact_arrays:
+                np.save(os.path.join(staging, f'{name}.npy'), getattr(self, name))
+            shapes = {}
+            for name in self._artifact_matrices:
+                matrix = getattr(self, name)
+                for part in ('data', 'indices', 'indptr'):
+                    np.save(os.path.join(staging, f'{name}.{part}.npy'), getattr(matrix, part))
+                shapes[name] = list(matrix.shape)
+            np.save(os.path.join(staging, 'tfidf_idf.npy'), self.tfidf_idf)
+            with open(os.path.join(staging, 'metadata.json'), 'w') as f:
+                json.dump({
+                    'version': ARTIFACT_VERSION,
+                    'fingerprint': self.fingerprint,
+                    'shapes': shapes,
+                    'vocabulary': {term: int(index) for term, index in self.tfidf_vocabulary.items()}
+                }, f)
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+            os.replace(staging, directory)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+    
+    @classmethod
+    def load(cls, directory, movies_df, ratings_df):
+        # Arrays are memory-mapped read-only, so loading is zero-copy and pages are shared between processes
+        start = time.perf_counter()
+        with open(os.path.join(directory, 'metadata.json')) as f:
+            metadata = json.load(f)
+        if metadata['version'] != ARTIFACT_VERSION:
+            raise ValueError(f"Artifact version {metadata['version']} in {directory} is not {ARTIFACT_VERSION}")
+        
+        recommender = cls(movies_df, ratings_df)
+        for name in cls._artifact_arrays:
+            setattr(recommender, name, np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r'))
+        for name in cls._artifact_matrices:
+            parts = [np.load(os.path.join(directory, f'{name}.{part}.npy'), mmap_mode='r') for part in ('data', 'indices', 'indptr')]
+            setattr(recommender, name, sparse.csr_matrix(tuple(parts), shape=tuple(metadata['shapes'][name]), copy=False))
+        
+        recommender.tfidf_vocabulary = metadata['vocabulary']
+        recommender.tfidf_idf = np.load(os.path.join(directory, 'tfidf_idf.npy'))
+        recommender.fingerprint = metadata['fingerprint']
+        recommender._build_lookups()
+        recommender._build_rating_summary()
+        recommender.stats.record('load_artifacts', time.perf_counter() - start)
+        return recommender
+    
+    @classmethod
+    def load_or_build(cls, movies_df, ratings_df, artifact_root=ARTIFACT_DIR):
+        # Reuse persisted artifacts for identical input data; rebuild and persist only when the data changes
+        recommender = cls(movies_df, ratings_df)
+        fingerprint = recommender.model_fingerprint()
+        directory = os.path.join(artifact_root, fingerprint)
+        if os.path.exists(os.path.join(directory, 'metadata.json')):
+            try:
+                loaded = cls.load(directory, movies_df, ratings_df)
+                loaded.stats.increment('artifact_cache_hits')
+                return loaded
+            except (OSError, ValueError, KeyError):
+                pass  # Corrupt or outdated artifacts: fall through to a rebuild
+        
+        recommender.stats.increment('artifact_cache_misses')
+        recommender.prepare_data()
+        recommender.fingerprint = fingerprint
+        recommender.save(directory)
+        return recommender
+    
+    @staticmethod
+    def _expand_rows(array, positions, length):
+        # Move existing rows to their positions in a grown index (new rows are zero). Arrays that do not grow are
+        # reused as-is when writable; read-only memory-mapped artifacts are copied once.
+        if len(array) == length:
+            return array if array.flags.writeable else np.array(array)
+        expanded = np.zeros((length,) + array.shape[1:], dtype=array.dtype)
+        expanded[positions] = array
+        return expanded
+    
+    @classmethod
+    def _insert_ids(cls, sorted_ids, ids):
+        # Returns the grown sorted id map, the new positions of the existing ids and the positions of inserted ids
+        _, known = cls._sorted_positions(sorted_ids, ids)
+        unseen = np.unique(ids[~known])
+        if len(unseen) == 0:
+            return sorted_ids, np.arange(len(sorted_ids)), unseen.astype(np.int64)
+        merged = np.insert(sorted_ids, np.searchsorted(sorted_ids, unseen), unseen).astype(np.int32)
+        return merged, np.searchsorted(merged, sorted_ids), np.searchsorted(merged, unseen)
+    
+    @staticmethod
+    def _grow_csr(matrix, old_rows, n_rows, old_columns, n_columns):
+        # Place existing rows and columns at their positions in grown id maps. New rows only change indptr; stored
+        # column indices are remapped only when new ids were inserted between existing ones, not when appended.
+        if matrix.shape == (n_rows, n_columns):
+            return matrix
+        indptr, indices = matrix.indptr, matrix.indices
+        if n_rows != matrix.shape[0]:
+            row_lengths = np.zeros(n_rows, dtype=indptr.dtype)
+            row_lengths[old_rows] = np.diff(indptr)
+            indptr = np.concatenate(([0], np.cumsum(row_lengths))).astype(indptr.dtype)
+        if len(old_columns) and old_columns[-1] != len(old_columns) - 1:
+            indices = old_columns[indices].astype(indices.dtype)
+        grown = sparse.csr_matrix((matrix.data, indices, indptr), shape=(n_rows, n_columns), copy=False)
+        grown.has_sorted_indices = True
+        return grown
+    
+    @staticmethod
+    def _insert_sorted(array, positions, values):
+        # np.insert for non-decreasing positions, as one slice copy per inserted value (no full-size masks)
+        result = np.empty(len(array) + len(values), dtype=array.dtype)
+        previous = 0
+        for offset, (position, value) in enumerate(zip(positions, values)):
+            result[previous + offset:position + offset] = array[previous:position]
+            result[position + offset] = value
+            previous = position
+        result[previous + len(values):] = array[previous:]
+        return result
+    
+    @classmethod
+    def _upsert_entries(cls, matrix, rows, columns, values):
+        # Set matrix[rows, columns] = values for unique (row, column) pairs on a CSR matrix with sorted indices.
+        # Each pair is located by a binary search within its row: existing entries are overwritten in place, and only
+        # genuinely new ones are inserted (one contiguous copy of data/indices), so no sparse arithmetic is done.
+        order = np.lexsort((columns, rows))
+        rows, columns, values = rows[order], columns[order], values[order]
+        indptr, indices = matrix.indptr, matrix.indices
+        positions = np.empty(len(rows), dtype=np.int64)
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(rows)) + 1, [len(rows)]))
+        for begin, end in zip(bounds[:-1], bounds[1:]):
+            start, stop = indptr[rows[begin]], indptr[rows[begin] + 1]
+            positions[begin:end] = start + np.searchsorted(indices[start:stop], columns[begin:end])
+        exists = positions < indptr[rows + 1]
+        exists[exists] = indices[positions[exists]] == columns[exists]
+        
+        data = matrix.data if matrix.data.flags.writeable else np.array(matrix.data)
+        data[positions[exists]] = values[exists]
+        inserted = ~exists
+        if inserted.any():
+            data = cls._insert_sorted(data, positions[inserted], values[inserted])
+            indices = cls._insert_sorted(indices, positions[inserted], columns[inserted])
+            row_counts = np.bincount(rows[inserted], minlength=matrix.shape[0])
+            indptr = indptr + np.concatenate(([0], np.cumsum(row_counts))).astype(indptr.dtype)
+        updated = sparse.csr_matrix((data, indices, indptr), shape=matrix.shape, copy=False)
+        updated.has_sorted_indices = True
+        if not values.all():
+            # A zero rating removes the entry, as in _ratings_matrix. eliminate_zeros compacts indices/indptr in
+            # place, which memory-mapped artifacts do not allow, so it runs on a copy (deletions are rare).
+            updated = updated.copy()
+            updated.eliminate_zeros()
+        return updated
+    
+    @timed_stage('add_ratings')
+    def add_ratings(self, ratings_df):
+        # Fold new ratings into the fitted state without a prepare_data rebuild. Only rows touched by the batch get
+        # new norms and folded-in user factors; new movies get folded-in item factors. Existing item factors and the
+        # content index stay as fitted until the next full rebuild.
+        ratings_df = ratings_df[['user_id', 'movie_id', 'rating']]
+        if len(ratings_df) == 0:
+            return
+        
+        # Insert unseen ids into the sorted id maps; existing rows and columns keep their relative order
+        user_ids, old_rows, new_rows = self._insert_ids(self.user_ids, ratings_df['user_id'].to_numpy())
+        movie_ids, old_columns, new_columns = self._insert_ids(self.movie_ids, ratings_df['movie_id'].to_numpy())
+        
+        # Re-ratings within the batch: the last one wins
+        latest = ~ratings_df.duplicated(['user_id', 'movie_id'], keep='last').to_numpy()
+        rows = np.searchsorted(user_ids, ratings_df['user_id'].to_numpy()[latest]).astype(np.int32)
+        columns = np.searchsorted(movie_ids, ratings_df['movie_id'].to_numpy()[latest]).astype(np.int32)
+        values = ratings_df['rating'].to_numpy(dtype=np.float32)[latest]
+        
+        # Both orientations are updated entry by entry; re-ratings replace the previous value
+        matrix = self._grow_csr(self.user_movie_matrix, old_rows, len(user_ids), old_columns, len(movie_ids))
+        matrix = self._upsert_entries(matrix, rows, columns, values)
+        matrix_t = self._grow_csr(self.user_movie_matrix_t, old_columns, len(movie_ids), old_rows, len(user_ids))
+        matrix_t = self._upsert_entries(matrix_t, columns, rows, values)
+        
+        user_norms = self._expand_rows(self.user_norms, old_rows, len(user_ids))
+        user_factors = self._expand_rows(self.user_factors, old_rows, len(user_ids))
+        item_factors = self._expand_rows(self.item_factors, old_columns, len(movie_ids))
+        
+        # Fold new movies into the latent space from their ratings (all in this batch): v = r^T (U S) / s^2
+        if len(new_columns) and item_factors.shape[1]:
+            singular_values_sq = (self.user_factors.astype(np.float64) ** 2).sum(axis=0)
+            new_entries = np.isin(columns, new_columns)
+            new_ratings = sparse.csr_matrix(
+                (values[new_entries], (np.searchsorted(new_columns, columns[new_entries]), rows[new_entries])),
+                shape=(len(new_columns), len(user_ids))
+            )
+            projected = (new_ratings @ user_factors).astype(np.float64)
+            item_factors[new_columns] = np.divide(
+                projected, singular_values_sq, out=np.zeros_like(projected), where=singular_values_sq > 0
+            )
+        
+        # Refresh norms and fold in the updated rating rows of every touched user: u = r V
+        touched_rows = np.unique(rows)
+        touched = matrix[touched_rows]
+        user_norms[touched_rows] = self._row_norms(touched)
+        user_factors[touched_rows] = touched @ item_factors
+        
+        # The ratings table only takes the batch once the model has been updated from it
+        self._ratings_frames.append(ratings_df)
+        self.user_movie_matrix, self.user_movie_matrix_t = matrix, matrix_t
+        self.user_ids, self.movie_ids = user_ids, movie_ids
+        self.user_norms, self.user_factors, self.item_factors = user_norms, user_factors, item_factors
+        self.column_rows = self._movie_rows(self.movie_ids)
+        delta_counts = self._count_ratings(ratings_df['rating'].to_numpy())
+        self.rating_counts = self.rating_counts.add(delta_counts, fill_value=0).astype(np.int64)
+        self.n_ratings += len(ratings_df)
+        self.fingerprint = None  # No longer matches the persisted artifacts
+        self.data_version += 1
+    
+    @timed_stage('add_movies')
+    def add_movies(self, movies_df):
+        # Append catalogue entries: TF-IDF rows come from the fitted vocabulary, and the neighbour index is merged
+        # with the new movies' similarities instead of being rebuilt
+        movies_df = movies_df.copy()
+        movies_df['combined_features'] = self._combined_features(movies_df)
+        genre_is_categorical = isinstance(self.movies_df['genre'].dtype, pd.CategoricalDtype)
+        n_existing = len(self.movies_df)
+        
+        self.movies_df = pd.concat([self.movies_df, movies_df], ignore_index=True)
+        if genre_is_categorical:
+            self.movies_df['genre'] = self.movies_df['genre'].astype('category')
+        new_features = self._fitted_vectorizer().transform(movies_df['combined_features'])
+        self.tfidf_matrix = sparse.vstack([self.tfidf_matrix, new_features], format='csr')
+        
+        n_movies = len(self.movies_df)
+        k = max(min(self.content_neighbours, n_movies - 1), 0)
+        neighbour_ids = np.full((n_movies, k), -1, dtype=np.int32)
+        neighbour_scores = np.full((n_movies, k), -np.inf, dtype=np.float32)
+        width = self.content_neighbour_ids.shape[1]
+        neighbour_ids[:n_existing, :width] = self.content_neighbour_ids
+        neighbour_scores[:n_existing, :width] = self.content_neighbour_scores
+        
+        # Blocks run one at a time here, so a single block may use the whole content_block_elements budget
+        features_t = self.tfidf_matrix.T.tocsc()
+        block_size = max(1, self.content_block_elements // n_movies)
+        for start in range(n_existing, n_movies, block_size):
+            stop = min(start + block_size, n_movies)
+            block_ids = np.arange(start, stop, dtype=np.int32)
+            similarity = (self.tfidf_matrix[start:stop] @ features_t).toarray().astype(np.float32, copy=False)
+            similarity[np.arange(stop - start), block_ids] = -np.inf
+            
+            # Neighbours of the new movies themselves (existing and new rows, including earlier blocks)
+            neighbour_ids[start:stop], neighbour_scores[start:stop] = self._top_k(similarity, k)
+            
+            # Previously indexed rows only change where a new movie beats their current K-th neighbour
+            # (rows added by this call were already ranked against the whole catalogue above)
+            candidates = similarity[:, :n_existing].T
+            improved = np.flatnonzero(candidates.max(axis=1) > neighbour_scores[:n_existing, -1]) if k else []
+            if len(improved):
+                merged_ids = np.concatenate(
+                    [neighbour_ids[improved], np.broadcast_to(block_ids, (len(improved), len(block_ids)))], axis=1
+                )
+                merged_scores = np.concatenate([neighbour_scores[improved], candidates[improved]], axis=1)
+                top, top_scores = self._top_k(merged_scores, k)
+                neighbour_ids[improved] = np.where(top >= 0, np.take_along_axis(merged_ids, np.maximum(top, 0), axis=1), -1)
+                neighbour_scores[improved] = top_scores
+        
+        self.content_neighbour_ids, self.content_neighbour_scores = neighbour_ids, neighbour_scores
+        self._build_lookups()
+        self.fingerprint = None
+        self.data_version += 1
+    
+    def _build_content_neighbours(self, features, k, n_jobs=None):
+        # TF-IDF rows are L2-normalized, so a block of cosine similarities is just a sparse product.
+        # The content_block_elements budget is shared by all workers: fewer workers when a single row of the
+        # catalogue already uses a large share of it, and smaller blocks the more workers there are.
+        n_movies = features.shape[0]
+        k = max(min(k, n_movies - 1), 0)
+        neighbour_ids = np.full((n_movies, k), -1, dtype=np.int32)
+        neighbour_scores = np.full((n_movies, k), -np.inf, dtype=np.float32)
+        if k == 0:
+            return neighbour_ids, neighbour_scores
+        
+        features = features.tocsr()
+        features_t = features.T.tocsc()
+        n_workers = max(1, min(n_jobs or os.cpu_count(), self.content_block_elements // n_movies))
+        block_size = max(1, self.content_block_elements // (n_workers * n_movies))
         
-        # Content similarity matrix
-        self.content_similarity_matrix = cosine_similarity(self.tfidf_matrix)
+        def fill_block(start):
+            stop = min(start + block_size, n_movies)
+            similarity = (features[start:stop] @ features_t).toarray().astype(np.float32, copy=False)
+            similarity[np.arange(stop - start), np.arange(start, stop)] = -np.inf  # Skip the movie itself
+            neighbour_ids[start:stop], neighbour_scores[start:stop] = self._top_k(similarity, k)
         
+        # Sparse products and partitions release the GIL, so threads share the matrix without copies
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            list(executor.map(fill_block, range(0, n_movies, block_size)))
+        
+        return neighbour_ids, neighbour_scores
+    
+    @staticmethod
+    def _index_ids(ids):
+        # Map raw ids to sorted unique ids and contiguous int32 positions (so lookups can use searchsorted).
+        # Dense non-negative integer ids, the usual case, are indexed with a lookup table in one O(n) pass.
+        if len(ids) and ids.dtype.kind in 'iu' and ids.min() >= 0 and ids.max() < 4 * len(ids) + 1024:
+            present = np.zeros(int(ids.max()) + 1, dtype=bool)
+            present[ids] = True
+            unique_ids = np.flatnonzero(present)
+            lookup = np.zeros(len(present), dtype=np.int32)
+            lookup[unique_ids] = np.arange(len(unique_ids), dtype=np.int32)
+            return unique_ids.astype(np.int32), lookup[ids]
+        unique_ids, positions = np.unique(ids, return_inverse=True)
+        return unique_ids.astype(np.int32), positions.astype(np.int32)
+    
+    @classmethod
+    def _build_user_movie_matrix(cls, ratings_df):
+        user_ids, rows = cls._index_ids(ratings_df['user_id'].to_numpy())
+        movie_ids, cols = cls._index_ids(ratings_df['movie_id'].to_numpy())
+        values = ratings_df['rating'].to_numpy(dtype=np.float32)
+        shape = (len(user_ids), len(movie_ids))
+        
+        return cls._ratings_matrix(rows, cols, values, shape), user_ids, movie_ids
+    
+    @staticmethod
+    def _ratings_matrix(rows, cols, values, shape):
+        # CSR construction would sum repeated (user, movie) pairs; keep only the latest rating instead,
+        # which is also how add_ratings treats a re-rating
+        matrix = sparse.csr_matrix((values, (rows, cols)), shape=shape, dtype=np.float32)
+        if matrix.nnz != len(values):
+            latest = ~pd.DataFrame({'row': rows, 'col': cols}).duplicated(keep='last').to_numpy()
+            matrix = sparse.csr_matrix((values[latest], (rows[latest], cols[latest])), shape=shape, dtype=np.float32)
+        matrix.eliminate_zeros()
+        return matrix
+    
+    @staticmethod
+    def _sorted_positions(sorted_ids, ids):
+        # Vectorized id -> position lookup; returns the positions and a mask of ids that are known
+        ids = np.asarray(ids).ravel()
+        if len(sorted_ids) == 0:
+            return np.zeros(len(ids), dtype=np.int32), np.zeros(len(ids), dtype=bool)
+        positions = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1).astype(np.int32)
+        return positions, sorted_ids[positions] == ids
+    
+    def _user_rows(self, user_ids):
+        return self._sorted_positions(self.user_ids, user_ids)
+    
+    @staticmethod
+    def _row_norms(matrix):
+        return np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1), dtype=np.float32).ravel())
+    
+    def _collaborative_scores(self, user_rows):
+        # Cosine similarity of each requested user against every user, as one sparse matrix product
+        user_rows = np.asarray(user_rows, dtype=np.int32)
+        batch_ratings = self.user_movie_matrix[user_rows]
+        norms = self.user_norms
+        similarity = (batch_ratings @ self.user_movie_matrix_t).toarray().astype(np.float32, copy=False)
+        denominator = norms[user_rows, None] * norms[None, :]
+        np.divide(similarity, denominator, out=similarity, where=denominator > 0)
+        similarity[np.arange(len(user_rows)), user_rows] = -np.inf  # A user is not their own neighbour
+        
+        # Top similar users per row via argpartition, then their similarity-weighted ratings in one product
+        n_neighbours = min(self.n_similar_users, similarity.shape[1] - 1)
+        if n_neighbours <= 0:
+            return np.zeros((len(user_rows), self.user_movie_matrix.shape[1]), dtype=np.float32)
+        # Partition in place (no negated copy) and keep only the neighbour columns
+        neighbours = np.argpartition(similarity, similarity.shape[1] - n_neighbours, axis=1)[:, -n_neighbours:]
+        weights = np.take_along_axis(similarity, neighbours, axis=1)
+        weights[~np.isfinite(weights)] = 0
+        neighbour_weights = sparse.csr_matrix(
+            (weights.ravel(), neighbours.ravel(), np.arange(0, weights.size + 1, n_neighbours)),
+            shape=similarity.shape
+        )
+        scores = (neighbour_weights @ self.user_movie_matrix).toarray()
+        
+        # Only catalogued movies some neighbour rated and the user has not rated are candidates, so top-k is
+        # never filled with ratings for movies that cannot be shown
+        scores[scores <= 0] = -np.inf
+        scores[:, self.column_rows < 0] = -np.inf
+        rated_rows, rated_columns = batch_ratings.nonzero()
+        scores[rated_rows, rated_columns] = -np.inf
+        return scores
+    
+    @staticmethod
+    def _top_k(scores, k):
+        # Per-row top-k with argpartition; slots without a finite score are padded with -1 / -inf
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            return np.empty((scores.shape[0], 0), dtype=np.int32), np.empty((scores.shape[0], 0), dtype=np.float32)
+        top = np.argpartition(scores, scores.shape[1] - k, axis=1)[:, -k:]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1).astype(np.int32)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        top[~np.isfinite(top_scores)] = -1
+        return top, top_scores
+    
+    def collaborative_filtering_top_k(self, user_ids, n_recommendations=5):
+        # Batch API: returns (movie_ids, scores) arrays of shape (len(user_ids), n_recommendations),
+        # padded with -1 / -inf for unknown users or when fewer candidates exist
+        user_rows, known = self._user_rows(user_ids)
+        movie_ids = np.full((len(user_rows), n_recommendations), -1, dtype=np.int32)
+        scores = np.full((len(user_rows), n_recommendations), -np.inf, dtype=np.float32)
+        
+        # Batches are sized so the dense similarity and score blocks stay within collaborative_block_elements
+        known_batch = np.flatnonzero(known)
+        batch_size = max(1, self.collaborative_block_elements // max(self.user_movie_matrix.shape))
+        for start in range(0, len(known_batch), batch_size):
+            batch = known_batch[start:start + batch_size]
+            with self.stats.stage('neighbour_search'):
+                top_columns, top_scores = self._top_k(self._collaborative_scores(user_rows[batch]), n_recommendations)
+            width = top_columns.shape[1]
+            movie_ids[batch, :width] = np.where(top_columns >= 0, self.movie_ids[top_columns], -1)
+            scores[batch, :width] = top_scores
+        
+        return movie_ids, scores
+    
+    @timed_stage('collaborative_filtering_recommendations')
+    def batch_collaborative_filtering_recommendations(self, user_ids, n_recommendations=5):
+        movie_ids, scores = self.collaborative_filtering_top_k(user_ids, n_recommendations)
+        _, known = self._user_rows(user_ids)
+        
+        batch_recommendations = []
+        for is_known, user_movie_ids, user_scores in zip(known, movie_ids, scores):
+            if not is_known:
+                batch_recommendations.append(self.get_popular_movies(n_recommendations))
+                continue
+            movie_rows = self._movie_rows(user_movie_ids)
+            found = movie_rows >= 0
+            batch_recommendations.append(self._format_recommendations(movie_rows[found], user_scores[found]))
+        
+        return batch_recommendations
+    
+    @cached_result(_normalize_user)
     def collaborative_filtering_recommendations(self, user_id, n_recommendations=5):
-        if user_id not in self.user_movie_matrix.index:
+        return self.batch_collaborative_filtering_recommendations([user_id], n_recommendations)[0]
+    
+    def _fold_in(self, ratings):
+        # Project ratings of a user outside the training matrix into the latent space: u = r V
+        movie_ids = np.fromiter(ratings.keys(), dtype=np.int64, count=len(ratings))
+        values = np.fromiter(ratings.values(), dtype=np.float32, count=len(ratings))
+        columns, known = self._sorted_positions(self.movie_ids, movie_ids)
+        return values[known] @ self.item_factors[columns[known]], columns[known], values[known]
+    
+    def _user_profile(self, user_id, ratings=None):
+        # Latent vector, rated matrix columns and their ratings for a known user, or folded in from a
+        # {movie_id: rating} dict for a user outside the training matrix; None when neither is available
+        user_rows, known = self._user_rows([user_id])
+        if known[0]:
+            user_ratings = self.user_movie_matrix[user_rows[0]]
+            return self.user_factors[user_rows[0]], user_ratings.indices, user_ratings.data
+        if ratings:
+            return self._fold_in(ratings)
+        return None
+    
+    @cached_result(_normalize_user)
+    @timed_stage('matrix_factorization_recommendations')
+    def matrix_factorization_recommendations(self, user_id, n_recommendations=5, ratings=None):
+        # Users outside the training matrix can pass their {movie_id: rating} dict to be folded in
+        profile = self._user_profile(user_id, ratings)
+        if profile is None:
             return self.get_popular_movies(n_recommendations)
+        user_vector, rated_columns, _ = profile
         
-        # Get user's ratings
-        user_ratings = self.user_movie_matrix.loc[user_id]
+        # One rank-k dot product per movie, already-rated and uncatalogued movies masked, then top-k
+        scores = self.item_factors @ user_vector
+        scores[rated_columns] = -np.inf
+        scores[self.column_rows < 0] = -np.inf
+        top_columns, top_scores = self._top_k(scores[None, :], n_recommendations)
+        found = top_columns[0] >= 0
+        return self._format_recommendations(self.column_rows[top_columns[0][found]], top_scores[0][found])
+    
+    @staticmethod
+    def _unit_scale(scores):
+        scale = np.abs(scores).max() if len(scores) else 0
+        return scores / scale if scale > 0 else scores
+    
+    @cached_result(_normalize_hybrid)
+    @timed_stage('hybrid_recommendations')
+    def hybrid_recommendations(self, user_id, n_recommendations=5, collaborative_weight=0.5, content_weight=0.5,
+                               genres=None, min_year=None, max_year=None, ratings=None):
+        # Blend latent-factor scores and the similarity to the user's TF-IDF taste profile over the whole catalogue
+        # (one dense float32 vector each), apply filters, then select top-k once
+        profile = self._user_profile(user_id, ratings)
+        if profile is None:
+            return self.get_popular_movies(n_recommendations)
+        user_vector, rated_columns, rated_values = profile
+        n_movies = len(self.movies_df)
         
-        # Find similar users using cosine similarity
-        user_similarity = cosine_similarity([user_ratings], self.user_movie_matrix)[0]
-        similar_users = np.argsort(user_similarity)[::-1][1:11]  # Top 10 similar users
+        rated_rows = self.column_rows[rated_columns]
+        rated_in_catalogue = rated_rows >= 0
+        rated_rows, rated_values = rated_rows[rated_in_catalogue], rated_values[rated_in_catalogue]
         
-        # Get recommendations based on similar users
-        recommendations = {}
-        for similar_user in similar_users:
-            similar_user_ratings = self.user_movie_matrix.iloc[similar_user]
-            similarity_score = user_similarity[similar_user]
-            
-            for movie_id, rating in similar_user_ratings.items():
-                if rating > 0 and user_ratings[movie_id] == 0:  # Movie not rated by user
-                    if movie_id not in recommendations:
-                        recommendations[movie_id] = 0
-                    recommendations[movie_id] += rating * similarity_score
-        
-        # Sort and get top recommendations
-        top_recommendations = sorted(recommendations.items(), key=lambda x: x[1], reverse=True)[:n_recommendations]
-        
-        recommended_movies = []
-        for movie_id, score in top_recommendations:
-            movie_info = self.movies_df[self.movies_df['movie_id'] == movie_id].iloc[0]
-            recommended_movies.append({
-                'title': movie_info['title'],
-                'genre': movie_info['genre'],
-                'year': movie_info['year'],
-                'rating': movie_info['rating'],
-                'score': score
-            })
+        # Collaborative signal: one rank-k matrix-vector product, scattered from matrix columns to catalogue rows
+        column_scores = self.item_factors @ user_vector
+        in_catalogue = self.column_rows >= 0
+        collaborative = np.zeros(n_movies, dtype=np.float32)
+        collaborative[self.column_rows[in_catalogue]] = column_scores[in_catalogue]
+        
+        # Content signal: TF-IDF profile weighted by mean-centred ratings, scored with one sparse matrix-vector product
+        weights = rated_values - rated_values.mean() if len(rated_values) else rated_values
+        if not np.any(weights):
+            weights = rated_values
+        taste = sparse.csr_matrix(weights.astype(np.float32)[None, :]) @ self.tfidf_matrix[rated_rows]
+        content = (self.tfidf_matrix @ taste.T).toarray().ravel().astype(np.float32, copy=False)
+        
+        # Users with few ratings lean on content until they reach hybrid_confidence_ratings
+        confidence = min(1.0, len(rated_values) / self.hybrid_confidence_ratings)
+        scores = (
+            collaborative_weight * confidence * self._unit_scale(collaborative) +
+            content_weight * self._unit_scale(content)
+        )
+        
+        candidates = np.ones(n_movies, dtype=bool)
+        if genres:
+            candidates &= (self.genre_bits & self._genre_query(genres)).any(axis=1)
+        if min_year is not None:
+            candidates &= self.result_columns['year'] >= min_year
+        if max_year is not None:
+            candidates &= self.result_columns['year'] <= max_year
+        candidates[rated_rows] = False
+        scores[~candidates] = -np.inf
         
-        return recommended_movies
+        top_rows, top_scores = self._top_k(scores[None, :], n_recommendations)
+        found = top_rows[0] >= 0
+        return self._format_recommendations(top_rows[0][found], top_scores[0][found])
     
+    @timed_stage('materialize_results')
+    def _format_recommendations(self, movie_rows, scores):
+        # Gather every result field with one vectorized take per column, then zip into records
+        columns = [self.result_columns[name].take(movie_rows).tolist() for name in ('title', 'genre', 'year', 'rating')]
+        return [
+            {'title': title, 'genre': genre, 'year': year, 'rating': rating, 'score': score}
+            for title, genre, year, rating, score in zip(*columns, np.asarray(scores).tolist())
+        ]
+    
+    @cached_result(_normalize_titles)
+    @timed_stage('content_based_recommendations')
     def content_based_recommendations(self, movie_titles, n_recommendations=5):
-        recommendations = {}
+        movie_rows = self._title_rows(movie_titles)
+        movie_rows = movie_rows[movie_rows >= 0]
+        if len(movie_rows) == 0:
+            return []
         
-        for movie_title in movie_titles:
-            movie_idx = self.movies_df[self.movies_df['title'] == movie_title].index
-            if len(movie_idx) == 0:
-                continue
-                
-            movie_idx = movie_idx[0]
-            similarity_scores = self.content_similarity_matrix[movie_idx]
-            
-            # Get top similar movies
-            similar_movies = np.argsort(similarity_scores)[::-1][1:n_recommendations+5]
-            
-            for idx in similar_movies:
-                movie_id = self.movies_df.iloc[idx]['movie_id']
-                if movie_id not in recommendations:
-                    recommendations[movie_id] = 0
-                recommendations[movie_id] += similarity_scores[idx]
-        
-        # Sort and get top recommendations
-        top_recommendations = sorted(recommendations.items(), key=lambda x: x[1], reverse=True)[:n_recommendations]
-        
-        recommended_movies = []
-        for movie_id, score in top_recommendations:
-            movie_info = self.movies_df[self.movies_df['movie_id'] == movie_id].iloc[0]
-            recommended_movies.append({
-                'title': movie_info['title'],
-                'genre': movie_info['genre'],
-                'year': movie_info['year'],
-                'rating': movie_info['rating'],
-                'score': score
-            })
+        # Get top similar movies for every input at once (neighbour index rows are already sorted by score)
+        similar_movies = self.content_neighbour_ids[movie_rows, :n_recommendations+4].ravel()
+        similarity_scores = self.content_neighbour_scores[movie_rows, :n_recommendations+4].ravel()
+        found = similar_movies >= 0
+        
+        # Sum the scores of movies shared between inputs; ties keep first-seen order
+        candidates, first_seen, inverse = np.unique(similar_movies[found], return_index=True, return_inverse=True)
+        totals = np.bincount(inverse, weights=similarity_scores[found], minlength=len(candidates))
+        top_recommendations = np.lexsort((first_seen, -totals))[:n_recommendations]
         
-        return recommended_movies
+        return self._format_recommendations(candidates[top_recommendations], totals[top_recommendations])
     
+    @cached_result(_normalize_genres)
+    @timed_stage('genre_based_recommendations')
     def genre_based_recommendations(self, preferred_genres, n_recommendations=5):
-        filtered_movies = self.movies_df[
-            self.movies_df['genre'].str.contains('|'.join(preferred_genres), case=False, na=False)
-        ].sort_values('rating', ascending=False)
-        
-        recommendations = []
-        for _, movie in filtered_movies.head(n_recommendations).iterrows():
-            recommendations.append({
-                'title': movie['title'],
-                'genre': movie['genre'],
-                'year': movie['year'],
-                'rating': movie['rating'],
-                'score': movie['rating']
-            })
+        if len(preferred_genres) == 0:
+            return self.get_popular_movies(n_recommendations)
+        query = self._genre_query(preferred_genres)
+        if not query.any():
+            return []
+        
+        # popular_rows is the catalogue pre-sorted by rating: test genre bitmasks block by block in that order
+        # and stop as soon as enough movies match
+        matched_blocks = []
+        n_matched = 0
+        for start in range(0, len(self.popular_rows), self.genre_scan_block):
+            rows = self.popular_rows[start:start + self.genre_scan_block]
+            matched = rows[(self.genre_bits[rows] & query).any(axis=1)]
+            matched_blocks.append(matched)
+            n_matched += len(matched)
+            if n_matched >= n_recommendations:
+                break
         
-        return recommendations
+        recommended_rows = np.concatenate(matched_blocks)[:n_recommendations] if matched_blocks else self.popular_rows[:0]
+        return self._format_recommendations(recommended_rows, self.result_columns['rating'].take(recommended_rows))
     
+    @cached_result()
+    @timed_stage('get_popular_movies')
     def get_popular_movies(self, n_recommendations=5):
-        popular_movies = self.movies_df.sort_values('rating', ascending=False).head(n_recommendations)
-        
-        recommendations = []
-        for _, movie in popular_movies.iterrows():
-            recommendations.append({
-                'title': movie['title'],
-                'genre': movie['genre'],
-                'year': movie['year'],
-                'rating': movie['rating'],
-                'score': movie['rating']
-            })
-        
-        return recommendations
+        recommended_rows = self.popular_rows[:n_recommendations]
+        return self._format_recommendations(recommended_rows, self.result_columns['rating'].take(recommended_rows))
+
+def load_recommender():
+    movies_df, ratings_df = load_data()
+    return MovieRecommender.load_or_build(movies_df, ratings_df)
 
 # Main Streamlit App
 def main():
+    # The app's dependencies are imported here, so library, API and precompute users never load streamlit or plotly
+    import streamlit as st
+    import plotly.express as px
+    
+    # Set page config
+    st.set_page_config(
+        page_title="Movie Recommendation System",
+        page_icon="🎬",
+        layout="wide"
+    )
+    
     st.title("🎬 Movie Recommendation System")
     st.markdown("Discover your next favorite movie with personalized recommendations!")
     
-    # Load data
-    movies_df, ratings_df = load_sample_data()
-    
-    # Initialize recommender
-    recommender = MovieRecommender(movies_df, ratings_df)
-    recommender.prepare_data()
+    # Load data and the fitted recommender (shared across reruns and sessions)
+    page_start = time.perf_counter()
+    recommender = st.cache_resource(load_recommender)()
+    movies_df = recommender.movies_df
     
     # Sidebar
     st.sidebar.header("Recommendation Options")
     recommendation_type = st.sidebar.selectbox(
         "Choose Recommendation Type:",
-        ["Collaborative Filtering", "Content-Based", "Genre-Based", "Popular Movies"]
+        ["Collaborative Filtering", "Matrix Factorization", "Hybrid", "Content-Based", "Genre-Based", "Popular Movies"]
     )
     
     # Main content area
@@ -300,7 +1263,11 @@ def main():
             st.subheader("👥 Collaborative Filtering")
             st.write("Get recommendations based on users with similar tastes")
             
-            user_id = st.number_input("Enter User ID (1-100):", min_value=1, max_value=100, value=1)
+            min_user_id, max_user_id = int(recommender.user_ids.min()), int(recommender.user_ids.max())
+            user_id = st.number_input(
+                f"Enter User ID ({min_user_id}-{max_user_id}):",
+                min_value=min_user_id, max_value=max_user_id, value=min_user_id
+            )
             n_recs = st.slider("Number of recommendations:", 1, 10, 5)
             
             if st.button("Get Recommendations"):
@@ -315,14 +1282,68 @@ def main():
                 else:
                     st.write("No recommendations found. Try a different user ID.")
         
+        elif recommendation_type == "Matrix Factorization":
+            st.subheader("🧮 Matrix Factorization")
+            st.write("Get recommendations from latent taste factors learned from all ratings")
+            
+            min_user_id, max_user_id = int(recommender.user_ids.min()), int(recommender.user_ids.max())
+            user_id = st.number_input(
+                f"Enter User ID ({min_user_id}-{max_user_id}):",
+                min_value=min_user_id, max_value=max_user_id, value=min_user_id
+            )
+            n_recs = st.slider("Number of recommendations:", 1, 10, 5)
+            
+            if st.button("Get Recommendations"):
+                recommendations = recommender.matrix_factorization_recommendations(user_id, n_recs)
+                
+                if recommendations:
+                    for i, movie in enumerate(recommendations, 1):
+                        with st.expander(f"{i}. {movie['title']} ({movie['year']})"):
+                            st.write(f"**Genre:** {movie['genre']}")
+                            st.write(f"**Rating:** {movie['rating']}/10")
+                            st.write(f"**Predicted Score:** {movie['score']:.3f}")
+                else:
+                    st.write("No recommendations found. Try a different user ID.")
+        
+        elif recommendation_type == "Hybrid":
+            st.subheader("🔀 Hybrid Recommendations")
+            st.write("Blend collaborative and content signals, optionally filtered by genre and release year")
+            
+            min_user_id, max_user_id = int(recommender.user_ids.min()), int(recommender.user_ids.max())
+            user_id = st.number_input(
+                f"Enter User ID ({min_user_id}-{max_user_id}):",
+                min_value=min_user_id, max_value=max_user_id, value=min_user_id
+            )
+            collaborative_weight = st.slider("Collaborative weight (content gets the rest):", 0.0, 1.0, 0.5, 0.05)
+            filter_genres = st.multiselect("Only these genres (optional):", options=recommender.genre_names)
+            min_year, max_year = int(movies_df['year'].min()), int(movies_df['year'].max())
+            year_range = st.slider("Release years:", min_year, max_year, (min_year, max_year))
+            n_recs = st.slider("Number of recommendations:", 1, 10, 5)
+            
+            if st.button("Get Recommendations"):
+                recommendations = recommender.hybrid_recommendations(
+                    user_id, n_recs, collaborative_weight, 1 - collaborative_weight,
+                    filter_genres or None, year_range[0], year_range[1]
+                )
+                
+                if recommendations:
+                    for i, movie in enumerate(recommendations, 1):
+                        with st.expander(f"{i}. {movie['title']} ({movie['year']})"):
+                            st.write(f"**Genre:** {movie['genre']}")
+                            st.write(f"**Rating:** {movie['rating']}/10")
+                            st.write(f"**Hybrid Score:** {movie['score']:.3f}")
+                else:
+                    st.write("No recommendations found. Try relaxing the filters.")
+        
         elif recommendation_type == "Content-Based":
             st.subheader("📝 Content-Based Filtering")
             st.write("Get recommendations based on movie content similarity")
             
+            title_options = movies_df['title'].tolist()
             selected_movies = st.multiselect(
                 "Select movies you like:",
-                options=movies_df['title'].tolist(),
-                default=["The Matrix", "Inception"]
+                options=title_options,
+                default=[title for title in ["The Matrix", "Inception"] if title in title_options]
             )
             
             n_recs = st.slider("Number of recommendations:", 1, 10, 5)
@@ -343,14 +1364,10 @@ def main():
             st.subheader("🎭 Genre-Based Recommendations")
             st.write("Get recommendations based on your preferred genres")
             
-            all_genres = set()
-            for genres in movies_df['genre'].str.split('|'):
-                all_genres.update(genres)
-            
             selected_genres = st.multiselect(
                 "Select preferred genres:",
-                options=sorted(list(all_genres)),
-                default=["Action", "Sci-Fi"]
+                options=recommender.genre_names,
+                default=[genre for genre in ["Action", "Sci-Fi"] if genre in recommender.genre_names]
             )
             
             n_recs = st.slider("Number of recommendations:", 1, 10, 5)
@@ -382,43 +1399,156 @@ def main():
     
     with col2:
         st.subheader("📊 Dataset Overview")
-        st.metric("Total Movies", len(movies_df))
-        st.metric("Total Users", len(ratings_df['user_id'].unique()))
-        st.metric("Total Ratings", len(ratings_df))
+        with recommender.stats.stage('render_overview_metrics'):
+            st.metric("Total Movies", len(movies_df))
+            st.metric("Total Users", len(recommender.user_ids))
+            st.metric("Total Ratings", recommender.n_ratings)
         
         # Genre distribution
-        all_genres = []
-        for genres in movies_df['genre'].str.split('|'):
-            all_genres.extend(genres)
-        
-        genre_counts = pd.Series(all_genres).value_counts().head(10)
-        
-        fig = px.bar(
-            x=genre_counts.index,
-            y=genre_counts.values,
-            title="Top 10 Genres",
-            labels={'x': 'Genre', 'y': 'Count'}
-        )
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        with recommender.stats.stage('render_genre_chart'):
+            genre_counts = recommender.genre_counts.head(10)
+            
+            fig = px.bar(
+                x=genre_counts.index,
+                y=genre_counts.values,
+                title="Top 10 Genres",
+                labels={'x': 'Genre', 'y': 'Count'}
+            )
+            fig.update_layout(height=400)
+            st.plotly_chart(fig, use_container_width=True)
         
         # Rating distribution
-        fig2 = px.histogram(
-            ratings_df,
-            x='rating',
-            title="Rating Distribution",
-            labels={'rating': 'Rating', 'count': 'Count'}
-        )
-        fig2.update_layout(height=300)
-        st.plotly_chart(fig2, use_container_width=True)
+        with recommender.stats.stage('render_rating_chart'):
+            # Drawn from the pre-aggregated counts: one bar per rating value instead of every rating row
+            rating_counts = recommender.rating_counts
+            fig2 = px.bar(
+                x=rating_counts.index,
+                y=rating_counts.values,
+                title="Rating Distribution",
+                labels={'x': 'Rating', 'y': 'Count'}
+            )
+            fig2.update_layout(height=300)
+            st.plotly_chart(fig2, use_container_width=True)
     
     # Footer
     st.markdown("---")
     st.markdown("**How it works:**")
     st.markdown("• **Collaborative Filtering:** Recommends movies based on users with similar preferences")
+    st.markdown("• **Matrix Factorization:** Recommends movies predicted from latent taste factors of all users and movies")
+    st.markdown("• **Hybrid:** Blends collaborative and content signals with adjustable weights and filters")
     st.markdown("• **Content-Based:** Recommends movies similar to ones you already like")
     st.markdown("• **Genre-Based:** Recommends top-rated movies in your preferred genres")
     st.markdown("• **Popular Movies:** Shows highest-rated movies overall")
+    
+    recommender.stats.record('render_page', time.perf_counter() - page_start)
+    
+    # Performance panel: process-wide timings and counters of the shared recommender
+    with st.sidebar.expander("⏱️ Performance", expanded=False):
+        snapshot = recommender.stats.snapshot()
+        st.dataframe(recommender.stats.to_frame(), hide_index=True, use_container_width=True)
+        if snapshot['counters']:
+            st.json(snapshot['counters'])
+        st.caption("Result cache")
+        st.json(recommender.result_cache.stats())
+        st.download_button(
+            "Export as JSON",
+            data=json.dumps({'event': 'performance_snapshot', **snapshot, 'result_cache': recommender.result_cache.stats()}),
+            file_name="performance.json",
+            mime="application/json"
+        )
+        if st.button("Reset"):
+            recommender.stats.reset()
+            recommender.result_cache.clear()
+
+# Offline batch precomputation
+PRECOMPUTE_SHARD_SIZE = 4096
+
+_worker_state = {}
+
+def _init_precompute_worker(artifact_dir, movies_df, output_dir):
+    # Each worker memory-maps the same persisted model and output files, so nothing large is pickled or copied
+    ratings_df = pd.DataFrame({
+        'user_id': np.empty(0, dtype=np.int32), 'movie_id': np.empty(0, dtype=np.int32), 'rating': np.empty(0, dtype=np.float32)
+    })  # Workers only score from the persisted matrix and never read the ratings table
+    _worker_state['recommender'] = MovieRecommender.load(artifact_dir, movies_df, ratings_df)
+    _worker_state['ids'] = np.load(os.path.join(output_dir, 'collaborative_ids.npy'), mmap_mode='r+')
+    _worker_state['scores'] = np.load(os.path.join(output_dir, 'collaborative_scores.npy'), mmap_mode='r+')
+
+def _precompute_shard(start, stop):
+    recommender = _worker_state['recommender']
+    ids, scores = recommender.collaborative_filtering_top_k(recommender.user_ids[start:stop], _worker_state['ids'].shape[1])
+    _worker_state['ids'][start:stop] = ids
+    _worker_state['scores'][start:stop] = scores
+    _worker_state['ids'].flush()
+    _worker_state['scores'].flush()
+    return stop - start
+
+def precompute_recommendations(recommender, artifact_dir, output_dir, n_recommendations=10, n_workers=None,
+                               shard_size=PRECOMPUTE_SHARD_SIZE):
+    # Writes fixed-width .npy files (int32 movie ids padded with -1, float32 scores), row-aligned with user_ids.npy
+    # and movie_ids.npy, which can be memory-mapped by whatever serves them
+    os.makedirs(output_dir, exist_ok=True)
+    n_users = len(recommender.user_ids)
+    np.save(os.path.join(output_dir, 'user_ids.npy'), recommender.user_ids)
+    np.lib.format.open_memmap(
+        os.path.join(output_dir, 'collaborative_ids.npy'), mode='w+', dtype=np.int32, shape=(n_users, n_recommendations)
+    ).flush()
+    np.lib.format.open_memmap(
+        os.path.join(output_dir, 'collaborative_scores.npy'), mode='w+', dtype=np.float32, shape=(n_users, n_recommendations)
+    ).flush()
+    
+    # Collaborative: user shards across a process pool sharing the memory-mapped model
+    shards = [(start, min(start + shard_size, n_users)) for start in range(0, n_users, shard_size)]
+    init_args = (artifact_dir, recommender.movies_df[['movie_id', 'title', 'genre', 'year', 'rating']], output_dir)
+    n_workers = min(n_workers or os.cpu_count(), max(len(shards), 1))
+    if n_workers <= 1:
+        _init_precompute_worker(*init_args)
+        for start, stop in shards:
+            _precompute_shard(start, stop)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_precompute_worker, initargs=init_args) as executor:
+            for future in [executor.submit(_precompute_shard, start, stop) for start, stop in shards]:
+                future.result()
+    
+    # Content: the neighbour index is already ranked, so every movie's top-N is one vectorized slice
+    movie_ids = recommender.movies_df['movie_id'].to_numpy(dtype=np.int32)
+    content_ids = np.full((len(movie_ids), n_recommendations), -1, dtype=np.int32)
+    content_scores = np.full((len(movie_ids), n_recommendations), -np.inf, dtype=np.float32)
+    neighbours = recommender.content_neighbour_ids[:, :n_recommendations]
+    width = neighbours.shape[1]
+    content_ids[:, :width] = np.where(neighbours >= 0, movie_ids[np.maximum(neighbours, 0)], -1)
+    content_scores[:, :width] = recommender.content_neighbour_scores[:, :n_recommendations]
+    np.save(os.path.join(output_dir, 'movie_ids.npy'), movie_ids)
+    np.save(os.path.join(output_dir, 'content_ids.npy'), content_ids)
+    np.save(os.path.join(output_dir, 'content_scores.npy'), content_scores)
+
+def precompute_main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='movie_recommender.py precompute',
+        description='Precompute top-N collaborative recommendations for every user and content recommendations for every movie.'
+    )
+    parser.add_argument('output_dir', help='Directory for the .npy result files')
+    parser.add_argument('-n', '--n-recommendations', type=int, default=10)
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--shard-size', type=int, default=PRECOMPUTE_SHARD_SIZE, help='Users per worker task')
+    parser.add_argument('--ratings', default=RATINGS_PATH, help='Ratings CSV/Parquet (default: sample data)')
+    parser.add_argument('--movies', default=MOVIES_PATH, help='Movies CSV/Parquet (default: sample data)')
+    parser.add_argument('--artifacts', default=ARTIFACT_DIR, help='Model artifact directory')
+    args = parser.parse_args(argv)
+    
+    if args.ratings and args.movies:
+        movies_df, ratings_df = load_dataset(args.ratings, args.movies)
+    else:
+        movies_df, ratings_df = load_sample_data()
+    recommender = MovieRecommender.load_or_build(movies_df, ratings_df, args.artifacts)
+    precompute_recommendations(
+        recommender, os.path.join(args.artifacts, recommender.fingerprint), args.output_dir,
+        args.n_recommendations, args.workers, args.shard_size
+    )
+    print(f"Wrote recommendations for {len(recommender.user_ids)} users and {len(movies_df)} movies to {args.output_dir}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == 'precompute':
+        precompute_main(sys.argv[2:])
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,261 @@
+# Asyncio HTTP service exposing a shared, preloaded MovieRecommender as JSON endpoints.
+#
+#   python recommendation_server.py --port 8000
+#
+#   GET /recommendations/collaborative?user_id=1&n=5
+#   GET /recommendations/hybrid?user_id=1&collaborative_weight=0.7&genre=Drama&min_year=1990&n=5
+#   GET /recommendations/content?title=The+Matrix&title=Inception&n=5
+#   GET /recommendations/genre?genre=Action&genre=Sci-Fi&n=5
+#   GET /recommendations/popular?n=5
+#   GET /health, GET /stats
+#
+# Collaborative requests arriving within a short window are scored together in one batched matrix computation.
+# All recommender work runs on a thread pool so the event loop only does I/O. Standard library only.
+import argparse
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from movie_recommender import ARTIFACT_DIR, MovieRecommender, load_data
+
+logger = logging.getLogger('movie_recommender.server')
+
+MAX_RECOMMENDATIONS = 100
+MAX_HEADER_BYTES = 16 * 1024
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class CollaborativeBatcher:
+    # Collects concurrent collaborative requests for up to max_delay seconds (or max_batch requests) and scores
+    # them with one batch_collaborative_filtering_recommendations call on the executor
+    def __init__(self, recommender, executor, max_delay=0.002, max_batch=256):
+        self.recommender = recommender
+        self.executor = executor
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self._pending = []
+        self._flush_handle = None
+
+    async def recommend(self, user_id, n_recommendations):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((user_id, n_recommendations, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch):
+        user_ids = [user_id for user_id, _, _ in batch]
+        n_recommendations = max(n for _, n, _ in batch)
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self.executor, self.recommender.batch_collaborative_filtering_recommendations, user_ids, n_recommendations
+            )
+        except Exception as error:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        self.recommender.stats.increment('server_collaborative_batches')
+        self.recommender.stats.increment('server_collaborative_batched_requests', len(batch))
+        for (_, n, future), recommendations in zip(batch, results):
+            if not future.done():
+                future.set_result(recommendations[:n])
+
+class RecommendationServer:
+    def __init__(self, recommender, max_workers=None, batch_delay=0.002, max_batch=256):
+        self.recommender = recommender
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count())
+        self.batcher = CollaborativeBatcher(recommender, self.executor, batch_delay, max_batch)
+        self.routes = {
+            '/recommendations/collaborative': self.collaborative,
+            '/recommendations/hybrid': self.hybrid,
+            '/recommendations/content': self.content,
+            '/recommendations/genre': self.genre,
+            '/recommendations/popular': self.popular,
+            '/health': self.health,
+            '/stats': self.stats
+        }
+
+    async def _in_executor(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    @staticmethod
+    def _n_recommendations(params):
+        try:
+            n_recommendations = int(params.get('n', ['5'])[0])
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "'n' must be an integer")
+        if not 1 <= n_recommendations <= MAX_RECOMMENDATIONS:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"'n' must be between 1 and {MAX_RECOMMENDATIONS}")
+        return n_recommendations
+
+    async def collaborative(self, params):
+        try:
+            user_id = int(params['user_id'][0])
+        except (KeyError, ValueError):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "'user_id' must be an integer")
+        return await self.batcher.recommend(user_id, self._n_recommendations(params))
+
+    @staticmethod
+    def _optional_number(params, name, cast):
+        if name not in params:
+            return None
+        try:
+            return cast(params[name][0])
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"'{name}' must be a number")
+
+    async def hybrid(self, params):
+        try:
+            user_id = int(params['user_id'][0])
+        except (KeyError, ValueError):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "'user_id' must be an integer")
+        collaborative_weight = self._optional_number(params, 'collaborative_weight', float)
+        if collaborative_weight is None:
+            collaborative_weight = 0.5
+        if not 0 <= collaborative_weight <= 1:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "'collaborative_weight' must be between 0 and 1")
+        return await self._in_executor(
+            self.recommender.hybrid_recommendations, user_id, self._n_recommendations(params),
+            collaborative_weight, 1 - collaborative_weight, params.get('genre'),
+            self._optional_number(params, 'min_year', int), self._optional_number(params, 'max_year', int)
+        )
+
+    async def content(self, params):
+        if not params.get('title'):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "at least one 'title' is required")
+        return await self._in_executor(
+            self.recommender.content_based_recommendations, params['title'], self._n_recommendations(params)
+        )
+
+    async def genre(self, params):
+        if not params.get('genre'):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "at least one 'genre' is required")
+        return await self._in_executor(
+            self.recommender.genre_based_recommendations, params['genre'], self._n_recommendations(params)
+        )
+
+    async def popular(self, params):
+        return await self._in_executor(self.recommender.get_popular_movies, self._n_recommendations(params))
+
+    async def health(self, params):
+        return {'status': 'ok', 'movies': len(self.recommender.movies_df), 'users': len(self.recommender.user_ids)}
+
+    async def stats(self, params):
+        return self.recommender.stats.snapshot()
+
+    async def handle_connection(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive; request bodies are read and ignored
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, {'error': 'headers too large'}, False)
+                    return
+                except asyncio.IncompleteReadError:
+                    return
+
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': 'malformed request line'}, False)
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+                # Without a valid length the body cannot be skipped, so the connection is closed after the error
+                content_length = headers.get('content-length', '0') or '0'
+                if not content_length.isdecimal():
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': 'invalid Content-Length'}, False)
+                    return
+                if int(content_length):
+                    await reader.readexactly(int(content_length))
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+
+                status, payload = await self._dispatch(method, target)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, target):
+        if method != 'GET':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'only GET is supported'}
+        url = urlsplit(target)
+        handler = self.routes.get(url.path)
+        if handler is None:
+            return HTTPStatus.NOT_FOUND, {'error': f'unknown path {url.path}'}
+        try:
+            return HTTPStatus.OK, await handler(parse_qs(url.query))
+        except RequestError as error:
+            return error.status, {'error': str(error)}
+        except Exception:
+            logger.exception('Error handling %s', target)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'internal error'}
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        writer.write(
+            f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode() + body
+        )
+        await writer.drain()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        addresses = ', '.join(str(sock.getsockname()) for sock in server.sockets)
+        logger.info('Serving recommendations on %s', addresses)
+        async with server:
+            await server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve movie recommendations over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=None, help='Executor threads (default: all cores)')
+    parser.add_argument('--batch-delay-ms', type=float, default=2.0, help='Collaborative micro-batching window')
+    parser.add_argument('--max-batch', type=int, default=256, help='Largest collaborative batch')
+    parser.add_argument('--artifacts', default=ARTIFACT_DIR, help='Model artifact directory')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    movies_df, ratings_df = load_data()
+    recommender = MovieRecommender.load_or_build(movies_df, ratings_df, args.artifacts)
+    server = RecommendationServer(recommender, args.workers, args.batch_delay_ms / 1000, args.max_batch)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from movie_recommender import MovieRecommender, load_sample_data
+
+# add_ratings must leave the model exactly as a full rebuild from the concatenated ratings would
+BATCHES = [
+    {'user_id': [1, 1, 2], 'movie_id': [1, 1, 3], 'rating': [2, 5, 4]},  # Re-rating within the batch: last one wins
+    {'user_id': [101, 3], 'movie_id': [2, 51], 'rating': [3, 4]},  # New user and new movie, both appended
+    {'user_id': [0], 'movie_id': [0], 'rating': [1]},  # New ids inserted before existing ones
+    {'user_id': [], 'movie_id': [], 'rating': []},  # Empty micro-batch
+]
+
+def batch_frame(batch):
+    return pd.DataFrame(batch).astype({'user_id': np.int32, 'movie_id': np.int32, 'rating': np.int8})
+
+class AddRatingsTest(unittest.TestCase):
+    def setUp(self):
+        self.movies_df, self.ratings_df = load_sample_data()
+        self.artifact_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.artifact_root.cleanup)
+
+    def built(self):
+        recommender = MovieRecommender(self.movies_df.copy(), self.ratings_df)
+        recommender.prepare_data()
+        return recommender
+
+    def loaded(self):
+        MovieRecommender.load_or_build(self.movies_df.copy(), self.ratings_df, self.artifact_root.name)
+        recommender = MovieRecommender.load_or_build(self.movies_df.copy(), self.ratings_df, self.artifact_root.name)
+        self.assertEqual(recommender.stats.counters.get('artifact_cache_hits'), 1)
+        return recommender
+
+    def deletion_batch(self, recommender):
+        # A zero rating removes an existing entry
+        row = recommender.user_movie_matrix[0]
+        return {'user_id': [int(recommender.user_ids[0])], 'movie_id': [int(recommender.movie_ids[row.indices[0]])], 'rating': [0]}
+
+    def assert_matches_rebuild(self, recommender):
+        ratings_df = recommender.ratings_df
+        matrix, user_ids, movie_ids = MovieRecommender._build_user_movie_matrix(ratings_df)
+        np.testing.assert_array_equal(recommender.user_ids, user_ids)
+        np.testing.assert_array_equal(recommender.movie_ids, movie_ids)
+        self.assertEqual(abs(recommender.user_movie_matrix - matrix).max(), 0)
+        self.assertEqual(abs(recommender.user_movie_matrix_t - matrix.T.tocsr()).max(), 0)
+        self.assertEqual(recommender.user_movie_matrix.nnz, matrix.nnz)
+        self.assertEqual(recommender.user_movie_matrix_t.nnz, matrix.nnz)
+        np.testing.assert_allclose(recommender.user_norms, MovieRecommender._row_norms(matrix), rtol=1e-6)
+        self.assertEqual(recommender.n_ratings, len(ratings_df))
+        self.assertEqual(
+            recommender.rating_counts.to_dict(), MovieRecommender._count_ratings(ratings_df['rating'].to_numpy()).to_dict()
+        )
+
+    def check(self, recommender):
+        n_ratings = len(recommender.ratings_df)
+        for batch in BATCHES + [self.deletion_batch(recommender)]:
+            recommender.add_ratings(batch_frame(batch))
+            n_ratings += len(batch['rating'])
+            self.assertEqual(len(recommender.ratings_df), n_ratings)
+            self.assert_matches_rebuild(recommender)
+
+    def test_built_model(self):
+        self.check(self.built())
+
+    def test_loaded_model(self):
+        self.check(self.loaded())
+
+    def test_empty_batch_is_a_no_op(self):
+        recommender = self.built()
+        data_version = recommender.data_version
+        recommender.add_ratings(batch_frame(BATCHES[-1]))
+        self.assertEqual(recommender.data_version, data_version)
+        self.assertEqual(len(recommender.ratings_df), len(self.ratings_df))
+
+if __name__ == '__main__':
+    unittest.main()